@@ -1,69 +1,470 @@
 #!/usr/bin/env python3
+import io
 import os
+import errno
+import filecmp
+import hashlib
 import sys
+import time
+import json
 import shutil
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Iterable, List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional, Union
 
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
+
+# optional: PyTurboJPEG talks to libjpeg-turbo directly for jpg -> jpg bakes
+# (pip install PyTurboJPEG, plus libjpeg-turbo from your package manager).
+# Without it we go through Pillow; on ARM/Termux `pip install pillow-simd`
+# gives a NEON-accelerated drop-in Pillow built against libjpeg-turbo.
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420, TJFLAG_PROGRESSIVE
+except ImportError:
+    TurboJPEG = None
+
+# optional: io_uring (pip install liburing) batches metadata syscalls on Linux.
+# Android's seccomp policy usually blocks it for apps; we fall back quietly.
+liburing = None
+if sys.platform == "linux":
+    try:
+        import liburing
+    except ImportError:
+        pass
+
+# optional: xxhash (pip install xxhash) for --dedup fingerprints; blake2b otherwise
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+FINGERPRINT_CHUNK = 64 * 1024  # --dedup hashes this much of each end of a file
+
+URING_BATCH = 256
+DELETE_BATCH = 128  # --delete-originals: wins collected per io_uring unlink batch
 
 IMG_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+IMG_SUFFIXES = tuple(IMG_EXTS)  # for str.endswith
+JPEG_EXTS = {".jpg", ".jpeg"}
+PIL_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+
+# libjpeg's standard luminance quant table (quality 50); a file's own table
+# measured against it gives a quality estimate without decoding anything
+STD_LUMA_QTABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)
+# SOFn markers (0xC4 DHT, 0xC8 JPG, 0xCC DAC sit in the same range)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_PROGRESSIVE_SOF = {0xC2, 0xC6, 0xCA, 0xCE}
+
+# (path, stat) as produced by the folder scan
+ImageEntry = Tuple[Path, os.stat_result]
+
+_turbojpeg = None  # None = not loaded yet, False = unavailable
+
+# optional: --gpu-decode sends big jpegs through nvJPEG via torchvision
+# (CUDA builds of torch + torchvision >= 0.19, which added GPU encode).
+# Imported lazily: torch takes seconds to load and most runs don't want it.
+_gpu_jpeg = None  # None = not loaded yet, False = unavailable
+GPU_MIN_PIXELS = 4_000_000  # below this the host<->GPU copies eat the gain
+
+# remembers keep-mode files that didn't shrink, so reruns don't re-decode them
+NO_WIN_CACHE_PATH = Path.home() / ".cache" / "finald" / "no_win.json"
+
+BYTE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB", "EB")
+BYTE_SCALES = tuple(float(1 << (10 * i)) for i in range(len(BYTE_UNITS)))
 
 # ---------- helpers ----------
 
 def is_marked_d(path: Path) -> bool:
     return "[D]" in path.stem
 
-def mark_name(path: Path, new_ext: str) -> Path:
-    # keep name, append [D], enforce ext
-    return path.with_name(f"{path.stem}[D]{new_ext}")
+def output_ext(src: Path, output_fmt: str) -> str:
+    return src.suffix.lower() if output_fmt == "keep" else "." + output_fmt
 
-def safe_tmp_name(final_path: Path) -> Path:
-    # IMPORTANT: keep a real image extension so Pillow knows format
-    # foo[D].jpg -> foo[D].tmp.jpg
-    return final_path.with_name(final_path.stem + ".tmp" + final_path.suffix)
+def marked_paths(base: str, ext: str) -> Tuple[Path, Path]:
+    # keep name, append [D], enforce ext: foo.JPG -> foo[D].jpg
+    # plus a temp name to write beside it first, so a crash never leaves a
+    # half-written final: foo[D].jpg -> foo[D].tmp.jpg
+    return Path(f"{base}[D]{ext}"), Path(f"{base}[D].tmp{ext}")
 
 def fmt_bytes(n: int) -> str:
-    n = float(n)
-    for unit in ["B","KB","MB","GB","TB","PB"]:
-        if n < 1024.0:
-            return f"{n:.2f}{unit}" if unit != "B" else f"{int(n)}{unit}"
-        n /= 1024.0
-    return f"{n:.2f}EB"
+    if -1024 < n < 1024:
+        return f"{int(n)}B"
+    # unit straight from the bit length (sign-agnostic): one division, no loop
+    shift = (n.bit_length() - 1) // 10
+    if shift > 6:  # EB is the largest unit
+        shift = 6
+    return f"{n / BYTE_SCALES[shift]:.2f}{BYTE_UNITS[shift]}"
+
+def load_no_win_cache(path: Path = NO_WIN_CACHE_PATH) -> dict:
+    # {str(src): [size, mtime, quality]}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def save_no_win_cache(cache: dict, path: Path = NO_WIN_CACHE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(cache))
+    os.replace(tmp, path)
+
+def no_win_stamp(st: os.stat_result, quality: int) -> list:
+    # a cached no-win only holds while the file and quality are unchanged
+    return [st.st_size, int(st.st_mtime), quality]
+
+def scan_files(folder, recursive: bool, skip_hidden: bool = False) -> Iterator[os.DirEntry]:
+    # os.scandir hands back d_type with each name, so is_dir/is_file cost no
+    # syscall and entry.stat() is the only one per file (rglob+is_file+stat
+    # used to stat everything twice)
+    # skip_hidden prunes dot-folders (.thumbnails, .trashed-*, ...) before
+    # descending into them
+    # symlinked folders aren't descended into; symlinked files count as files
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not (skip_hidden and entry.name.startswith(".")):
+                            yield from scan_files(entry.path, recursive, skip_hidden)
+                    elif entry.is_file():
+                        yield entry
+                except OSError:
+                    pass
+    except OSError:
+        pass  # unreadable or vanished folder
+
+def fast_copy(src: Path, dst: Path) -> None:
+    # shutil.copy2 equivalent that keeps the bytes in the kernel:
+    # copy_file_range (Linux 4.5+, reflinks on btrfs/xfs) -> sendfile -> read/write
+    with open(src, "rb", buffering=0) as fsrc:
+        st = os.fstat(fsrc.fileno())
+        # opening dst truncates it: a copy onto itself would wipe the original
+        try:
+            dst_st = os.stat(dst)
+        except FileNotFoundError:
+            pass
+        else:
+            if (dst_st.st_dev, dst_st.st_ino) == (st.st_dev, st.st_ino):
+                raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+
+        with open(dst, "wb", buffering=0) as fdst:
+            in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+            left = st.st_size
+
+            try:
+                while left > 0:
+                    n = os.copy_file_range(in_fd, out_fd, left)
+                    if not n:
+                        break
+                    left -= n
+            except (AttributeError, OSError):
+                pass  # old kernel/python, cross-device or FUSE storage
+
+            try:
+                while left > 0:
+                    n = os.sendfile(out_fd, in_fd, None, left)
+                    if not n:
+                        break
+                    left -= n
+            except (AttributeError, OSError):
+                pass
+
+            # both calls advance the file offsets, so this only copies what's left
+            shutil.copyfileobj(fsrc, fdst)
+
+    shutil.copystat(src, dst)
+
+def fingerprint(path: Path, size: int) -> bytes:
+    # head + tail is enough to tell same-size images apart without reading
+    # whole files; group_duplicates confirms real matches byte for byte
+    h = xxhash.xxh64() if xxhash is not None else hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        h.update(f.read(FINGERPRINT_CHUNK))
+        if size > FINGERPRINT_CHUNK:
+            f.seek(max(FINGERPRINT_CHUNK, size - FINGERPRINT_CHUNK))
+            h.update(f.read(FINGERPRINT_CHUNK))
+    return h.digest()
+
+def group_duplicates(files: List[ImageEntry], skip_if_marked: bool) -> Tuple[List[ImageEntry], dict]:
+    """
+    Returns: (files to bake, {baked src: [duplicate entries]})
+    Only files sharing an exact size are fingerprinted at all.
+    """
+    def groupable(src: Path) -> bool:
+        return not (skip_if_marked and is_marked_d(src))
+
+    size_counts = {}
+    for src, st in files:
+        if groupable(src):
+            size_counts[st.st_size] = size_counts.get(st.st_size, 0) + 1
+
+    firsts = {}
+    to_bake = []
+    duplicates = {}
+    for entry in files:
+        src, st = entry
+        if not groupable(src) or size_counts[st.st_size] < 2:
+            to_bake.append(entry)
+            continue
+        try:
+            key = st.st_size, fingerprint(src, st.st_size)
+            first = firsts.setdefault(key, entry)
+            # a wrong match could hand out the wrong picture (and delete the
+            # original), so confirm before skipping the bake
+            if first is not entry and filecmp.cmp(first[0], src, shallow=False):
+                duplicates.setdefault(first[0], []).append(entry)
+                continue
+        except OSError:
+            pass
+        to_bake.append(entry)
+    return to_bake, duplicates
+
+def replaced_output_size(final: Path) -> int:
+    # an output left by an earlier run is already counted in the folder size
+    try:
+        return os.stat(final).st_size
+    except FileNotFoundError:
+        return 0
+
+def link_duplicate(baked_src: Path, dup: Path, output_fmt: str, backup_dir: Optional[Path]) -> Tuple[Path, int]:
+    # gives dup the output already baked for an identical file: a hardlink,
+    # or a copy where links don't work (FAT/sdcardfs, across filesystems).
+    # Returns the output and the size of the stale one it replaced, if any.
+    baked_final, _ = marked_paths(os.path.splitext(os.fspath(baked_src))[0], output_ext(baked_src, output_fmt))
+    final, tmp = marked_paths(os.path.splitext(os.fspath(dup))[0], output_ext(dup, output_fmt))
+
+    if backup_dir:
+        # first, so a failed backup (SameFileError when dup already sits in
+        # backup_dir) leaves dup and its output untouched and it isn't deleted
+        fast_copy(dup, backup_dir / dup.name)
+
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(baked_final, tmp)
+    except OSError:
+        fast_copy(baked_final, tmp)
+    replaced_size = replaced_output_size(final)
+    os.replace(tmp, final)
+    return final, replaced_size
+
+def uring_batches(items: list, prep) -> Iterator[Tuple[object, int]]:
+    # prep(sqe, item) fills one SQE per item; URING_BATCH of them go to the
+    # kernel per io_uring_enter. Yields (item, res) with res < 0 = -errno.
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    liburing.io_uring_queue_init(URING_BATCH, ring)
+    try:
+        for start in range(0, len(items), URING_BATCH):
+            chunk = items[start:start + URING_BATCH]
+            for i, item in enumerate(chunk):
+                sqe = liburing.io_uring_get_sqe(ring)
+                prep(sqe, item)
+                liburing.io_uring_sqe_set_data64(sqe, i)
+            liburing.io_uring_submit_and_wait(ring, len(chunk))
+
+            done = 0
+            while done < len(chunk):
+                ready = liburing.io_uring_cq_ready(ring)
+                if not ready:
+                    liburing.io_uring_wait_cqe_nr(ring, cqe, 1)
+                    continue
+                liburing.io_uring_peek_cqe(ring, cqe)
+                for j in range(ready):
+                    c = cqe[j]
+                    item = chunk[c.user_data]
+                    try:
+                        res = c.res
+                    except OSError as e:  # liburing raises on negative res
+                        res = -e.errno
+                    yield item, res
+                liburing.io_uring_cq_advance(ring, ready)
+                done += ready
+    finally:
+        liburing.io_uring_queue_exit(ring)
+
+def folder_size_uring(folder: Path) -> int:
+    # walk without stat'ing (d_type is enough), then statx in batches
+    paths = [entry.path for entry in scan_files(folder, recursive=True)]
+    bufs = {}
+
+    def prep(sqe, path: str) -> None:
+        bufs[path] = stx = liburing.Statx()
+        liburing.io_uring_prep_statx(sqe, stx, path, 0, liburing.STATX_SIZE)
+
+    total = 0
+    for path, res in uring_batches(paths, prep):
+        stx = bufs.pop(path)
+        if res == 0:
+            total += stx.size
+    return total
+
+def unlink_many(paths: List[Path]) -> List[Tuple[Path, str]]:
+    # batched unlinkat through io_uring; one unlink() each when unavailable.
+    # Returns (path, reason) for every original that is still there.
+    def prep(sqe, path: Path) -> None:
+        liburing.io_uring_prep_unlink(sqe, os.fspath(path))
+
+    if liburing is not None:
+        try:
+            return [
+                (path, os.strerror(-res))
+                for path, res in uring_batches(paths, prep)
+                if res < 0 and res != -errno.ENOENT
+            ]
+        except OSError:
+            pass  # io_uring not permitted/available here
+    failed = []
+    for p in paths:
+        try:
+            p.unlink(missing_ok=True)
+        except OSError as e:
+            failed.append((p, e.strerror or str(e)))
+    return failed
 
 def folder_size_bytes(folder: Path) -> int:
+    if liburing is not None:
+        try:
+            return folder_size_uring(folder)
+        except OSError:
+            pass  # io_uring not permitted/available here
+
     total = 0
-    for p in folder.rglob("*"):
-        if p.is_file():
+    for entry in scan_files(folder, recursive=True):
+        try:
+            total += entry.stat().st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+def iter_images(folder: Path, recursive: bool) -> Iterator[ImageEntry]:
+    for entry in scan_files(folder, recursive, skip_hidden=True):
+        # match on the raw name; Path objects only for actual images
+        # (a bare ".jpg" has no suffix as far as Path is concerned)
+        name = entry.name.lower()
+        if name.endswith(IMG_SUFFIXES) and name not in IMG_EXTS:
             try:
-                total += p.stat().st_size
+                yield Path(entry.path), entry.stat()
             except FileNotFoundError:
                 pass
-    return total
 
-def iter_images_flat(folder: Path) -> List[Path]:
+def iter_images_flat(folder: Path) -> List[ImageEntry]:
     # flat scan (like your original) – fast and predictable
-    files = []
-    for p in sorted(folder.iterdir()):
-        if p.is_file() and p.suffix.lower() in IMG_EXTS:
-            files.append(p)
-    return files
+    return sorted(iter_images(folder, recursive=False), key=lambda e: e[0])
+
+def iter_images_recursive(folder: Path) -> Iterable[ImageEntry]:
+    return iter_images(folder, recursive=True)
+
+def get_turbojpeg():
+    # load libjpeg-turbo once per (worker) process
+    global _turbojpeg
+    if _turbojpeg is None:
+        _turbojpeg = False
+        if TurboJPEG is not None:
+            try:
+                _turbojpeg = TurboJPEG()
+            except (OSError, RuntimeError):
+                pass  # python module present, shared library missing
+    return _turbojpeg or None
+
+def encode_jpeg_turbo(src_bytes: bytes, quality: int) -> Optional[bytes]:
+    # jpg -> jpg without Pillow: decode + progressive re-encode in libjpeg-turbo.
+    # Returns None when the caller should fall back to Pillow.
+    tj = get_turbojpeg()
+    if tj is None:
+        return None
+    try:
+        pixels = tj.decode(src_bytes)
+        return tj.encode(pixels, quality=quality, jpeg_subsample=TJSAMP_420, flags=TJFLAG_PROGRESSIVE)
+    except OSError:
+        # e.g. CMYK jpegs – Pillow handles those
+        return None
+
+def get_gpu_jpeg():
+    # (torch, torchvision.io) once per (worker) process, if CUDA is usable
+    global _gpu_jpeg
+    if _gpu_jpeg is None:
+        _gpu_jpeg = False
+        try:
+            import torch
+            from torchvision import io as tvio
+        except (ImportError, OSError):
+            return None  # not installed, or its CUDA/shared libraries won't load
+        if torch.cuda.is_available():
+            _gpu_jpeg = torch, tvio
+    return _gpu_jpeg or None
 
-def iter_images_recursive(folder: Path) -> Iterable[Path]:
-    for p in folder.rglob("*"):
-        if p.is_file() and p.suffix.lower() in IMG_EXTS:
-            yield p
+def encode_jpeg_gpu(src_bytes: bytes, quality: int) -> Optional[bytes]:
+    # jpg -> jpg on the GPU: one upload of the compressed stream, nvJPEG
+    # decode + encode on the device, one download of the result.
+    # Returns None when the caller should fall back to the CPU paths.
+    gpu = get_gpu_jpeg()
+    if gpu is None:
+        return None
+    torch, tvio = gpu
+    try:
+        data = torch.frombuffer(bytearray(src_bytes), dtype=torch.uint8)
+        pixels = tvio.decode_jpeg(data, mode=tvio.ImageReadMode.RGB, device="cuda")
+        return tvio.encode_jpeg(pixels, quality=quality).cpu().numpy().tobytes()
+    except (RuntimeError, ValueError):
+        # e.g. CMYK/progressive streams nvJPEG rejects, or out of GPU memory
+        return None
 
-def save_image_to_tmp(im: Image.Image, tmp_path: Path, quality: int) -> None:
-    ext = tmp_path.suffix.lower()
-    save_kwargs = {}
+def jpeg_header_info(src: Union[Path, bytes]) -> Tuple[bool, Optional[int]]:
+    """
+    Reads JPEG marker segments up to the first SOF, no pixel decode.
+    src is a path, or the file's bytes when they're already in memory.
+    Returns: (progressive, estimated_quality or None)
+    """
+    quality = None
+    with (io.BytesIO(src) if isinstance(src, bytes) else open(src, "rb")) as f:
+        if f.read(2) != b"\xff\xd8":
+            return False, None
+        while True:
+            hdr = f.read(4)
+            if len(hdr) < 4 or hdr[0] != 0xFF:
+                return False, quality  # odd layout: let the caller decode
+            marker = hdr[1]
+            length = int.from_bytes(hdr[2:], "big") - 2
+            if marker in JPEG_SOF_MARKERS:
+                return marker in JPEG_PROGRESSIVE_SOF, quality
+            if marker == 0xDB and quality is None:
+                seg = f.read(length)
+                # first table is luma: Pq/Tq byte, then 64 8-bit or 16-bit values
+                wide = len(seg) > 0 and seg[0] >> 4
+                if len(seg) >= (129 if wide else 65):
+                    if wide:
+                        table = [int.from_bytes(seg[1 + 2 * k:3 + 2 * k], "big") for k in range(64)]
+                    else:
+                        table = seg[1:65]
+                    scale = sum(table) * 100.0 / sum(STD_LUMA_QTABLE)
+                    quality = round((200 - scale) / 2 if scale <= 100 else 5000 / scale)
+                continue
+            f.seek(length, 1)
+
+def encode_image(im: Image.Image, ext: str, quality: int) -> bytes:
+    # encode in memory: the size decides the win before anything hits disk
+    save_kwargs = {"format": PIL_FORMATS[ext]}
 
     if ext in {".jpg", ".jpeg"}:
         if im.mode in ("RGBA", "LA"):
-            bg = Image.new("RGB", im.size, (0, 0, 0))
-            bg.paste(im, mask=im.split()[-1])
-            im = bg
+            alpha = im.getchannel("A")
+            if alpha.getextrema() == (255, 255):
+                # fully opaque (typical screenshot): just drop the channel
+                im = im.convert("RGB")
+            else:
+                bg = Image.new("RGB", im.size, (0, 0, 0))
+                bg.paste(im, mask=alpha)
+                im = bg
         else:
             im = im.convert("RGB")
         save_kwargs["quality"] = quality
@@ -81,11 +482,31 @@ def save_image_to_tmp(im: Image.Image, tmp_path: Path, quality: int) -> None:
         # png "quality" doesn't apply the same way
         save_kwargs["optimize"] = True
 
-    # ensure no stale tmp
-    if tmp_path.exists():
-        tmp_path.unlink()
+    buf = io.BytesIO()
+    im.save(buf, **save_kwargs)
+    return buf.getvalue()
 
-    im.save(tmp_path, **save_kwargs)
+def cheap_skip(
+    src: Path,
+    src_size: int,
+    output_fmt: str,
+    quality: int,
+    min_size: int,
+    src_bytes: Optional[bytes] = None,
+) -> Optional[str]:
+    # keep mode can only win by shrinking; don't decode (or read) what can't.
+    # Needs only the size and the jpeg header; returns the skip message.
+    if output_fmt != "keep":
+        return None
+    if src_size < min_size:
+        return f"⏭️ skip small {src.name} ({fmt_bytes(src_size)})"
+    if src.suffix.lower() in JPEG_EXTS:
+        # progressive implies optimized huffman tables, so re-encoding
+        # at the same or higher quality has nothing left to squeeze
+        progressive, src_quality = jpeg_header_info(src if src_bytes is None else src_bytes)
+        if progressive and src_quality is not None and src_quality <= quality:
+            return f"⏭️ skip already progressive q{src_quality} {src.name}"
+    return None
 
 def bake_one(
     src: Path,
@@ -94,39 +515,64 @@ def bake_one(
     delete_original_on_win: bool,
     backup_dir: Optional[Path],
     skip_if_marked: bool,
-) -> Tuple[bool, str, int, int]:
+    src_size: Optional[int] = None,
+    min_size: int = 0,
+    src_bytes: Optional[bytes] = None,
+    gpu_decode: bool = False,
+) -> Tuple[bool, str, int, int, int]:
     """
-    Returns: (won, message, src_size, out_size)
-    If won: writes marked output beside src and (optionally) deletes src.
+    Returns: (won, message, src_size, out_size, replaced_size)
+    If won: writes marked output beside src and (optionally) deletes src;
+    replaced_size is the size of an earlier run's output it overwrote.
     If not won: keeps src unchanged.
+    src_size can be passed in when the folder scan already stat'ed src, and
+    src_bytes when the caller already read it (read-ahead).
+    In keep mode, files under min_size bytes and jpegs that are already
+    progressive at or below the target quality are skipped undecoded.
+    gpu_decode re-encodes jpgs of GPU_MIN_PIXELS or more on the GPU (baseline
+    output, so it may win by a little less than the CPU paths).
     """
     if skip_if_marked and is_marked_d(src):
-        return False, f"⏭️ skip already marked {src.name}", 0, 0
+        return False, f"⏭️ skip already marked {src.name}", 0, 0, 0
 
-    src_ext = src.suffix.lower()
+    base, src_ext = os.path.splitext(os.fspath(src))
+    src_ext = src_ext.lower()
+    target_ext = src_ext if output_fmt == "keep" else "." + output_fmt
 
-    if output_fmt == "keep":
-        target_ext = src_ext
-    else:
-        target_ext = "." + output_fmt
+    if src_size is None:
+        src_size = src.stat().st_size
 
-    final = mark_name(src, target_ext)
-    tmp = safe_tmp_name(final)
+    skip = cheap_skip(src, src_size, output_fmt, quality, min_size, src_bytes)
+    if skip:
+        return False, skip, 0, 0, 0
 
-    # optional backup of original
+    # optional backup of original (the runner creates backup_dir once)
     if backup_dir:
-        backup_dir.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, backup_dir / src.name)
-
-    src_size = src.stat().st_size
+        fast_copy(src, backup_dir / src.name)
 
-    with Image.open(src) as im:
-        save_image_to_tmp(im, tmp, quality)
+    # one big read instead of the decoder's many small ones
+    if src_bytes is None:
+        src_bytes = src.read_bytes()
 
-    if not tmp.exists():
-        raise RuntimeError("Temp output was not created (save failed).")
+    data = None
+    try:
+        if src_ext in JPEG_EXTS and target_ext in JPEG_EXTS:
+            if gpu_decode:
+                # header only; Pillow doesn't decode pixels until asked
+                with Image.open(io.BytesIO(src_bytes)) as probe:
+                    width, height = probe.size
+                if width * height >= GPU_MIN_PIXELS:
+                    data = encode_jpeg_gpu(src_bytes, quality)
+            if data is None:
+                data = encode_jpeg_turbo(src_bytes, quality)
+        if data is None:
+            with Image.open(io.BytesIO(src_bytes)) as im:
+                data = encode_image(im, target_ext, quality)
+    except UnidentifiedImageError:
+        # Pillow only sees a BytesIO here; name the file like it used to
+        raise UnidentifiedImageError(f"cannot identify image file {src.name!r}") from None
 
-    tmp_size = tmp.stat().st_size
+    tmp_size = len(data)
 
     # wins rule:
     # - if keeping same format: only win if smaller
@@ -134,21 +580,298 @@ def bake_one(
     won = (tmp_size < src_size) if output_fmt == "keep" else True
 
     if won:
-        if final.exists():
-            final.unlink()
-        tmp.rename(final)
+        final, tmp = marked_paths(base, target_ext)
+        tmp.write_bytes(data)
+        replaced_size = replaced_output_size(final)
+        # one atomic syscall, replaces a stale output from an earlier run
+        os.replace(tmp, final)
 
         if delete_original_on_win:
             src.unlink(missing_ok=True)
 
-        return True, f"✅ {src.name} -> {final.name} | {fmt_bytes(src_size)} -> {fmt_bytes(tmp_size)}", src_size, tmp_size
+        return True, f"✅ {src.name} -> {final.name} | {fmt_bytes(src_size)} -> {fmt_bytes(tmp_size)}", src_size, tmp_size, replaced_size
 
-    # not a win: discard tmp
-    tmp.unlink(missing_ok=True)
-    return False, f"↩️ kept original {src.name} (no win)", src_size, src_size
+    # not a win: nothing was written
+    return False, f"↩️ kept original {src.name} (no win)", src_size, src_size, 0
+
+BakeResult = Tuple[bool, str, int, int, int]
+
+PROGRESS_BATCH = 32       # lines per stdout write
+PROGRESS_INTERVAL = 0.5   # ...or sooner, so slow files still show up
+
+class ProgressWriter:
+    """Buffers progress lines so a batch costs one write() instead of one per file."""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.lines = []
+        self.last = time.monotonic()
+
+    def line(self, text: str) -> None:
+        self.lines.append(text)
+        now = time.monotonic()
+        if len(self.lines) >= PROGRESS_BATCH or now - self.last >= PROGRESS_INTERVAL:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> None:
+        if self.lines:
+            self.out.write("\n".join(self.lines) + "\n")
+            self.lines.clear()
+        self.out.flush()
+        self.last = now if now is not None else time.monotonic()
+
+def read_ahead(
+    files: Iterable[ImageEntry],
+    wanted,
+) -> Iterator[Tuple[ImageEntry, Optional[bytes]]]:
+    """
+    Double-buffered reads for the serial loop: while the caller bakes one
+    file, a helper thread reads the next. Yields (entry, bytes); bytes is None
+    when wanted(entry) is false or the read failed (bake_one reads/raises).
+    """
+    def read(path: Path) -> Optional[bytes]:
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        prev = None
+        for entry in files:
+            fut = reader.submit(read, entry[0]) if wanted(entry) else None
+            if prev is not None:
+                yield prev[0], prev[1].result() if prev[1] else None
+            prev = entry, fut
+        if prev is not None:
+            yield prev[0], prev[1].result() if prev[1] else None
+
+def iter_bake_results(
+    files: List[ImageEntry],
+    jobs: int,
+    threads: bool = False,
+    no_win_cache: Optional[dict] = None,
+    **bake_kwargs,
+) -> Iterator[Tuple[Path, Optional[BakeResult], Optional[Exception]]]:
+    """
+    Yields (src, result, error) per file.
+    jobs <= 1 runs in-process in input order; otherwise files are spread over a
+    process pool (or a thread pool with threads=True) and yielded as they
+    complete. Threads work because Pillow and libjpeg-turbo release the GIL
+    while coding, and they skip process startup and pickling.
+    With no_win_cache, files that didn't shrink last time are skipped without
+    decoding, and new no-wins are recorded into it.
+    """
+    quality = bake_kwargs["quality"]
+
+    def cached_result(src: Path, st: os.stat_result) -> Optional[BakeResult]:
+        if no_win_cache is not None and no_win_cache.get(str(src)) == no_win_stamp(st, quality):
+            return False, f"⏭️ skip no win last run {src.name}", 0, 0, 0
+        return None
+
+    def remember(src: Path, st: os.stat_result, result: BakeResult) -> None:
+        # skips report 0 bytes; only real no-wins are worth remembering
+        if no_win_cache is not None and not result[0] and result[2]:
+            no_win_cache[str(src)] = no_win_stamp(st, quality)
+
+    if jobs <= 1:
+        skip_if_marked = bake_kwargs["skip_if_marked"]
+        output_fmt = bake_kwargs["output_fmt"]
+        min_size = bake_kwargs.get("min_size", 0)
+
+        def wanted(entry: ImageEntry) -> bool:
+            # don't read ahead what will be skipped by name, cache, size or
+            # jpeg header anyway
+            src, st = entry
+            if (skip_if_marked and is_marked_d(src)) or cached_result(src, st) is not None:
+                return False
+            try:
+                return cheap_skip(src, st.st_size, output_fmt, quality, min_size) is None
+            except OSError:
+                return False  # bake_one hits it again and reports it
+
+        for (src, st), src_bytes in read_ahead(files, wanted):
+            cached = cached_result(src, st)
+            if cached:
+                yield src, cached, None
+                continue
+            try:
+                result = bake_one(src=src, src_size=st.st_size, src_bytes=src_bytes, **bake_kwargs)
+            except Exception as e:
+                yield src, None, e
+                continue
+            remember(src, st, result)
+            yield src, result, None
+        return
+
+    pool = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    # only a bounded window is queued, so an interrupt waits on a few running
+    # bakes instead of the whole remaining batch
+    window = jobs * 2
+    with pool(max_workers=jobs) as ex:
+        try:
+            todo = iter(files)
+            futures = {}
+            exhausted = False
+            while True:
+                while not exhausted and len(futures) < window:
+                    entry = next(todo, None)
+                    if entry is None:
+                        exhausted = True
+                        break
+                    src, st = entry
+                    cached = cached_result(src, st)
+                    if cached:
+                        yield src, cached, None
+                        continue
+                    futures[ex.submit(bake_one, src=src, src_size=st.st_size, **bake_kwargs)] = entry
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    src, st = futures.pop(fut)
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        yield src, None, e
+                        continue
+                    remember(src, st, result)
+                    yield src, result, None
+        except BaseException:
+            # Ctrl-C or the caller stopped early: drop whatever hasn't started
+            ex.shutdown(wait=False, cancel_futures=True)
+            raise
+
+def bake_files(
+    files: List[ImageEntry],
+    jobs: int,
+    threads: bool = False,
+    use_cache: bool = True,
+    dedup: bool = False,
+    **bake_kwargs,
+) -> Tuple[int, int, int, int]:
+    """
+    Bakes files with progress output.
+    Returns: (baked, kept, errors, size_delta)
+    size_delta is how many bytes the baked folders grew (negative = saved),
+    tallied from the bake results so callers don't need to rescan.
+    With dedup, identical files are baked once and the output is linked to
+    the others.
+    """
+    duplicates = {}
+    if dedup:
+        files, duplicates = group_duplicates(files, bake_kwargs["skip_if_marked"])
+
+    total = len(files) + sum(len(d) for d in duplicates.values())
+    baked = kept = errors = 0
+    size_delta = 0
+    delete_original_on_win = bake_kwargs["delete_original_on_win"]
+    output_fmt = bake_kwargs["output_fmt"]
+    backup_dir = bake_kwargs["backup_dir"]
+
+    # with io_uring, originals of wins are deleted here in batches instead of
+    # one unlink per bake_one; without it batching buys nothing
+    pending_deletes = [] if delete_original_on_win and liburing is not None else None
+    if pending_deletes is not None:
+        bake_kwargs = dict(bake_kwargs, delete_original_on_win=False)
+
+    # a no-win only means something when the format stays the same
+    no_win_cache = load_no_win_cache() if use_cache and output_fmt == "keep" else None
+    results = iter_bake_results(files, jobs, threads=threads, no_win_cache=no_win_cache, **bake_kwargs)
+    progress = ProgressWriter()
+    i = 0
+
+    def report(message: str) -> None:
+        nonlocal i
+        i += 1
+        pct = (i / total * 100.0) if total else 0.0
+        progress.line(f"[{i}/{total} | {pct:6.2f}%] {message}")
+
+    def flush_deletes() -> None:
+        nonlocal errors, size_delta
+        failed = dict(unlink_many([p for p, _ in pending_deletes]))
+        for p, src_size in pending_deletes:
+            if p in failed:
+                errors += 1
+                progress.line(f"❌ {p.name} | ERROR: could not delete original: {failed[p]}")
+            else:
+                size_delta -= src_size
+        pending_deletes.clear()
+
+    def count_win(src: Path, src_size: int, added: int, deleted: bool) -> None:
+        nonlocal baked, size_delta
+        baked += 1
+        # added = new output minus any stale one it replaced; the original
+        # only goes away once it's deleted
+        size_delta += added
+        if pending_deletes is not None:
+            pending_deletes.append((src, src_size))
+            if len(pending_deletes) >= DELETE_BATCH:
+                flush_deletes()
+        elif deleted:
+            size_delta -= src_size
+
+    try:
+        for src, result, err in results:
+            dups = duplicates.get(src, ())
+            if err is not None:
+                errors += 1 + len(dups)
+                report(f"❌ {src.name} | ERROR: {err}")
+                for dup, _ in dups:
+                    report(f"❌ {dup.name} | ERROR: duplicate of {src.name}: {err}")
+                continue
+
+            won, message, src_size, out_size, replaced_size = result
+            if won:
+                # bake_one raises if it can't delete, so a win here is gone
+                count_win(src, src_size, out_size - replaced_size, delete_original_on_win)
+            else:
+                kept += 1
+            report(message)
+
+            for dup, st in dups:
+                if not won:
+                    kept += 1
+                    report(f"↩️ kept original {dup.name} (same as {src.name})")
+                    continue
+                try:
+                    final, dup_replaced = link_duplicate(src, dup, output_fmt, backup_dir)
+                except OSError as e:
+                    errors += 1
+                    report(f"❌ {dup.name} | ERROR: {e}")
+                    continue
+                deleted = delete_original_on_win
+                if deleted and pending_deletes is None:
+                    try:
+                        dup.unlink(missing_ok=True)
+                    except OSError as e:
+                        deleted = False
+                        errors += 1
+                        progress.line(f"❌ {dup.name} | ERROR: could not delete original: {e.strerror or e}")
+                count_win(dup, st.st_size, out_size - dup_replaced, deleted)
+                report(f"🔗 {dup.name} -> {final.name} | duplicate of {src.name}")
+    finally:
+        results.close()  # stops the pool now rather than whenever it's collected
+        # outputs for these are already in place, so finish even on Ctrl-C
+        if pending_deletes:
+            flush_deletes()
+        progress.flush()
+        if no_win_cache is not None:
+            save_no_win_cache(no_win_cache)
+
+    return baked, kept, errors, size_delta
 
 # ---------- modes ----------
 
+def refuse_backup_inside(backup_dir: Optional[Path], roots: List[Path]) -> None:
+    # the summary sizes come from one scan plus the bakes' deltas, so backups
+    # landing in a scanned folder would go uncounted; a rerun would also
+    # scan (and bake, and delete) the backups themselves
+    if backup_dir is None:
+        return
+    for root in roots:
+        if backup_dir.resolve().is_relative_to(root.resolve()):
+            raise SystemExit(f"\nREFUSING: --backup must be outside the scanned folder {root}\n")
+
 def run_folder_mode(
     input_dir: Path,
     output_fmt: str,
@@ -157,45 +880,49 @@ def run_folder_mode(
     backup_dir: Optional[Path],
     skip_if_marked: bool,
     recursive: bool,
+    min_size: int = 0,
+    gpu_decode: bool = False,
+    jobs: int = 1,
+    threads: bool = False,
+    use_cache: bool = True,
+    dedup: bool = False,
 ) -> str:
     if not input_dir.is_dir():
         raise FileNotFoundError(f"Input folder not found: {input_dir}")
+    refuse_backup_inside(backup_dir, [input_dir])
 
     before = folder_size_bytes(input_dir)
 
     files = list(iter_images_recursive(input_dir)) if recursive else iter_images_flat(input_dir)
     total = len(files)
 
-    baked = kept = errors = 0
-
     print(f"Quality: {quality}")
     print(f"Found  : {total} images")
     print(f"Mark   : outputs get [D] in filename")
     print(f"Mode   : {'DELETE originals only when win' if delete_original_on_win else 'SAFE (no delete)'}")
     print(f"Scan   : {'recursive' if recursive else 'flat'}")
+    print(f"Jobs   : {jobs} {'threads' if threads else 'processes'}")
     print()
 
-    for i, src in enumerate(files, start=1):
-        pct = (i / total * 100.0) if total else 0.0
-        try:
-            won, message, _, _ = bake_one(
-                src=src,
-                output_fmt=output_fmt,
-                quality=quality,
-                delete_original_on_win=delete_original_on_win,
-                backup_dir=backup_dir,
-                skip_if_marked=skip_if_marked,
-            )
-            if won:
-                baked += 1
-            else:
-                kept += 1
-            print(f"[{i}/{total} | {pct:6.2f}%] {message}")
-        except Exception as e:
-            errors += 1
-            print(f"[{i}/{total} | {pct:6.2f}%] ❌ {src.name} | ERROR: {e}")
+    if backup_dir:
+        backup_dir.mkdir(parents=True, exist_ok=True)
 
-    after = folder_size_bytes(input_dir)
+    baked, kept, errors, size_delta = bake_files(
+        files,
+        jobs,
+        threads=threads,
+        output_fmt=output_fmt,
+        quality=quality,
+        delete_original_on_win=delete_original_on_win,
+        backup_dir=backup_dir,
+        skip_if_marked=skip_if_marked,
+        min_size=min_size,
+        gpu_decode=gpu_decode,
+        use_cache=use_cache,
+        dedup=dedup,
+    )
+
+    after = before + size_delta
     saved = before - after
     pct_saved = (saved / before * 100.0) if before else 0.0
 
@@ -230,6 +957,12 @@ def run_all_mode(
     backup_dir: Optional[Path],
     skip_if_marked: bool,
     confirm: str,
+    min_size: int = 0,
+    gpu_decode: bool = False,
+    jobs: int = 1,
+    threads: bool = False,
+    use_cache: bool = True,
+    dedup: bool = False,
 ) -> str:
     # hard safety lock
     required = "I UNDERSTAND THIS DELETES ORIGINALS"
@@ -241,50 +974,44 @@ def run_all_mode(
     roots = default_all_roots()
     if not roots:
         raise SystemExit("No default image roots found. (Need Termux storage access?)")
+    refuse_backup_inside(backup_dir, roots)
 
     # Create a master holding folder (just a name, we still operate in place)
     # You asked for “master clean” behavior; this is “operate in place across roots”.
     total_before = sum(folder_size_bytes(r) for r in roots)
 
-    all_files = []
-    for r in roots:
-        all_files.extend(list(iter_images_recursive(r)))
-
-    # filter
-    files = [p for p in all_files if p.suffix.lower() in IMG_EXTS]
-    if skip_if_marked:
-        files = [p for p in files if not is_marked_d(p)]
+    # one pass; the iterator already filters by extension
+    files = [
+        e for r in roots for e in iter_images_recursive(r)
+        if not (skip_if_marked and is_marked_d(e[0]))
+    ]
 
     total = len(files)
 
-    baked = kept = errors = 0
-
     print(f"ALL MODE roots:")
     for r in roots:
         print(f" - {r}")
     print(f"\nFound: {total} images total\n")
 
-    for i, src in enumerate(files, start=1):
-        pct = (i / total * 100.0) if total else 0.0
-        try:
-            won, message, _, _ = bake_one(
-                src=src,
-                output_fmt=output_fmt,
-                quality=quality,
-                delete_original_on_win=delete_original_on_win,
-                backup_dir=backup_dir,
-                skip_if_marked=skip_if_marked,
-            )
-            if won:
-                baked += 1
-            else:
-                kept += 1
-            print(f"[{i}/{total} | {pct:6.2f}%] {message}")
-        except Exception as e:
-            errors += 1
-            print(f"[{i}/{total} | {pct:6.2f}%] ❌ {src.name} | ERROR: {e}")
+    if backup_dir:
+        backup_dir.mkdir(parents=True, exist_ok=True)
 
-    total_after = sum(folder_size_bytes(r) for r in roots)
+    baked, kept, errors, size_delta = bake_files(
+        files,
+        jobs,
+        threads=threads,
+        output_fmt=output_fmt,
+        quality=quality,
+        delete_original_on_win=delete_original_on_win,
+        backup_dir=backup_dir,
+        skip_if_marked=skip_if_marked,
+        min_size=min_size,
+        gpu_decode=gpu_decode,
+        use_cache=use_cache,
+        dedup=dedup,
+    )
+
+    total_after = total_before + size_delta
     saved = total_before - total_after
     pct_saved = (saved / total_before * 100.0) if total_before else 0.0
 
@@ -308,13 +1035,23 @@ def main():
     ap.add_argument("--recursive", action="store_true", help="Recurse into subfolders (folder mode)")
     ap.add_argument("--fmt", choices=["keep", "jpg", "png", "webp"], default="keep", help="Output format")
     ap.add_argument("--quality", type=int, default=85, help="JPEG/WebP quality (default 85)")
+    ap.add_argument("--min-size", type=int, default=50, help="Keep mode: skip files smaller than this many KB (default 50, 0=off)")
+    ap.add_argument("--gpu-decode", action="store_true", help="Re-encode jpgs of 4MP+ on a CUDA GPU via nvJPEG (needs torch + torchvision; use a low --jobs)")
     ap.add_argument("--delete-originals", action="store_true", help="Delete originals only when win")
     ap.add_argument("--backup", help="Backup originals here before deletion (optional)")
     ap.add_argument("--skip-marked", action="store_true", default=True, help="Skip files already marked with [D] (default on)")
+    ap.add_argument("--jobs", type=int, help="Parallel workers (default: CPU count, or min(8, 2x CPU) with --threads; 1=serial in order)")
+    ap.add_argument("--threads", action="store_true", help="Use worker threads instead of processes (lighter on memory; best for jpg/webp, processes suit png)")
+    ap.add_argument("--dedup", action="store_true", help="Bake identical files once and hardlink (or copy) the output to the rest")
+    ap.add_argument("--no-cache", action="store_true", help="Re-try files that didn't shrink on a previous run (keep mode)")
     ap.add_argument("--confirm", default="", help="Required for ALL+delete: I UNDERSTAND THIS DELETES ORIGINALS")
 
     args = ap.parse_args()
 
+    cpus = os.cpu_count() or 1
+    if args.jobs is None:
+        args.jobs = min(8, cpus * 2) if args.threads else cpus
+
     backup_dir = Path(args.backup).expanduser().resolve() if args.backup else None
 
     if args.mode == "folder":
@@ -330,6 +1067,12 @@ def main():
             backup_dir=backup_dir,
             skip_if_marked=args.skip_marked,
             recursive=args.recursive,
+            min_size=args.min_size * 1024,
+            gpu_decode=args.gpu_decode,
+            jobs=args.jobs,
+            threads=args.threads,
+            use_cache=not args.no_cache,
+            dedup=args.dedup,
         )
         print(summary)
         return
@@ -342,6 +1085,12 @@ def main():
         backup_dir=backup_dir,
         skip_if_marked=args.skip_marked,
         confirm=args.confirm,
+        min_size=args.min_size * 1024,
+        gpu_decode=args.gpu_decode,
+        jobs=args.jobs,
+        threads=args.threads,
+        use_cache=not args.no_cache,
+        dedup=args.dedup,
     )
     print(summary)
 